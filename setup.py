@@ -30,7 +30,6 @@ setup(
         'mwtypes==0.2.0',
         'mwxml==0.2.0',
         'regex==2019.02.18',
-        'more-itertools==6.0.0',
         'fuzzywuzzy==0.8.0',
         'python-Levenshtein==0.12.0',
         'typing==3.5.0.1',
@@ -0,0 +1,82 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..', 'wikidump'))
+import datetime
+from wikidump.extractors import user_warnings_probabilistic_subst as subst
+
+def date(year: int, month: int = 1) -> datetime.datetime:
+    return datetime.datetime(year, month, 1, tzinfo=datetime.timezone.utc)
+
+# one revision of the words per year, from 2010 to 2012
+TEMPLATES_DICTIONARY = {
+    'first': [(('hello', 'world'), date(2010)), (('hello', 'greeting'), date(2011)), (('bye', 'greeting'), date(2012))],
+    'second': [(('warning', 'vandalism'), date(2011, 6))],
+}
+
+TEXT = 'hello world greeting bye warning vandalism'
+
+def found(trie_and_mapping) -> tuple:
+    """Words found in TEXT by the trie, with the template revisions selected"""
+    trie, words_mapping = trie_and_mapping
+    if trie is None:
+        return None, words_mapping
+    return sorted(subst.scan(trie, TEXT)), words_mapping
+
+def test_current_timestamp_cache():
+    trie_cache = dict()
+    # same template revisions (2011-02 and 2011-03), then different ones
+    results = list()
+    for timestamp in (date(2011, 2), date(2011, 3), date(2011, 7), date(2012, 5), date(2009)):
+        result = found(subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, timestamp))
+        assert found(subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, timestamp, trie_cache)) == result
+        results.append(repr(result))
+    # one trie per distinct selection of template revisions
+    assert len(trie_cache) == len(set(results)) > 1
+    # the same revisions are selected, the cached trie is returned
+    assert subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, date(2011, 2), trie_cache) is \
+        subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, date(2011, 3), trie_cache)
+
+def test_from_to_cache():
+    trie_cache = dict()
+    periods = (
+        (date(2010, 2), date(2011, 2)),
+        (date(2010, 3), date(2011, 3)),     # same revisions as the previous period
+        (date(2010, 3), date(2011, 7)),     # the second template is included
+        (date(2011), date(2011)),           # to_timestamp equal to a revision timestamp
+        (date(2011, 2), date(2012, 5)),
+        (date(2008), date(2009)),           # no template yet
+    )
+    results = list()
+    for from_timestamp, to_timestamp in periods:
+        result = found(subst.build_trie_from_to(TEMPLATES_DICTIONARY, from_timestamp, to_timestamp))
+        assert found(subst.build_trie_from_to(TEMPLATES_DICTIONARY, from_timestamp, to_timestamp, trie_cache)) == result
+        results.append(repr(result))
+    assert len(trie_cache) == len(set(results)) > 1
+    # the same revisions are selected, the cached trie is returned
+    assert subst.build_trie_from_to(TEMPLATES_DICTIONARY, *periods[0], trie_cache) is \
+        subst.build_trie_from_to(TEMPLATES_DICTIONARY, *periods[1], trie_cache)
+
+def test_no_template_cached(monkeypatch):
+    # the nltk corpora may not be downloaded
+    monkeypatch.setattr(subst, 'language_stopwords', lambda language: frozenset())
+    monkeypatch.setattr(subst, 'word_tokenize', str.split)
+    trie_cache = dict()
+    assert subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, date(2009), trie_cache) == (None, None)
+    assert list(trie_cache.values()) == [(None, None)]
+    assert subst.build_trie_current_timestamp(TEMPLATES_DICTIONARY, date(2009, 6), trie_cache) == (None, None)
+    assert len(trie_cache) == 1
+    assert subst.extract_probabilistic_user_warning_templates(TEXT, 'english', '2009-06-01T00:00:00Z', TEMPLATES_DICTIONARY, False, trie_cache) == []
+
+def test_cache_eviction():
+    # a revision of the words per month, each month selects a different trie
+    templates_dictionary = {
+        'first': [(('word{}'.format(month),), date(2000 + month // 12, month % 12 + 1)) for month in range(subst.TRIE_CACHE_SIZE * 2)],
+    }
+    trie_cache = dict()
+    for month in range(subst.TRIE_CACHE_SIZE * 2):
+        subst.build_trie_current_timestamp(templates_dictionary, date(2000 + month // 12, month % 12 + 1), trie_cache)
+        assert len(trie_cache) <= subst.TRIE_CACHE_SIZE
+    assert len(trie_cache) == subst.TRIE_CACHE_SIZE
+    # the oldest tries are evicted, the newest ones are kept
+    trie, words_mapping = subst.build_trie_current_timestamp(templates_dictionary, date(2000), trie_cache)
+    assert words_mapping['first'][0] == ('word0',)
+    assert len(trie_cache) == subst.TRIE_CACHE_SIZE
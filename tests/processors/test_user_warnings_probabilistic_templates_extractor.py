@@ -0,0 +1,221 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..', 'wikidump'))
+import io
+import bz2
+import gzip
+import json
+import signal
+import datetime
+import collections
+import mwxml
+import pytest
+from wikidump.extractors import user_warnings_probabilistic_subst
+from wikidump.processors import user_warnings_probabilistic_templates_extractor as extractor
+
+PAGE = '''<page><title>User talk:P{page}</title><ns>{ns}</ns><id>{page}</id>{revisions}</page>'''
+
+REVISION = '''<revision><id>{id}</id><timestamp>2012-0{month}-01T00:00:00Z</timestamp><contributor><username>U{month}</username><id>{month}</id></contributor><model>wikitext</model><format>text/x-wiki</format><text xml:space="preserve">{text}</text><sha1>x</sha1></revision>'''
+
+DUMP = '''<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" version="0.10" xml:lang="en"><siteinfo><sitename>W</sitename><dbname>enwiki</dbname><base>x</base><generator>g</generator><case>first-letter</case><namespaces><namespace key="2" case="first-letter">User</namespace><namespace key="3" case="first-letter">User talk</namespace></namespaces></siteinfo>{pages}</mediawiki>'''
+
+NUM_PAGES = 12
+
+TEMPLATES_DICTIONARY = {
+    'welcomeen-sq': [(('hello', 'world'), datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc))],
+}
+
+def dump_xml() -> bytes:
+    """Synthetic dump where one page every three contains the welcome words, a page every five is not a user talk page"""
+    pages = list()
+    for page in range(NUM_PAGES):
+        revisions = list()
+        for month in range(1, 4):
+            words = 'hello world' if page % 3 == 0 and month == 2 else 'nothing'
+            revisions.append(REVISION.format(id=page * 10 + month, month=month, text='some <!-- hello world --> talk {}'.format(words)))
+        pages.append(PAGE.format(page=page, ns=2 if page % 5 == 4 else 3, revisions=''.join(revisions)))
+    return DUMP.format(pages=''.join(pages)).encode('utf-8')
+
+def dump() -> mwxml.Dump:
+    return mwxml.Dump.from_file(io.BytesIO(dump_xml()))
+
+def extract_args(**kwargs) -> dict:
+    args = dict(
+        only_last_revision=False,
+        only_pages_with_user_warnings=False,
+        only_revisions_with_user_warnings=False,
+        templates_dictionary=TEMPLATES_DICTIONARY,
+        language='english',
+        stemmer=False,
+        trie_cache=dict(),
+    )
+    args.update(kwargs)
+    return args
+
+@pytest.fixture(autouse=True)
+def no_nltk_data(monkeypatch):
+    # the nltk corpora may not be downloaded
+    monkeypatch.setattr(user_warnings_probabilistic_subst, 'language_stopwords', lambda language: frozenset())
+    monkeypatch.setattr(user_warnings_probabilistic_subst, 'word_tokenize', str.split)
+
+def single_process(**kwargs):
+    stats = extractor.new_stats()
+    output = b''.join(
+        chunk for obj in extractor.extract_pages(dump(), stats=stats, **extract_args(**kwargs))
+        for chunk in extractor.serialize_page(obj)
+    )
+    return output, stats
+
+def test_workers_same_output_and_stats():
+    for kwargs in (dict(), dict(only_last_revision=True), dict(only_pages_with_user_warnings=True, only_revisions_with_user_warnings=True)):
+        expected_output, expected_stats = single_process(**kwargs)
+        stats = extractor.new_stats()
+        output = b''.join(extractor.extract_pages_parallel(dump(), stats=stats, workers=2, **extract_args(**kwargs)))
+        # same pages, in the dump order
+        assert output == expected_output
+        assert stats == expected_stats
+
+def test_workers_dry_run_stats():
+    _, expected_stats = single_process()
+    stats = extractor.new_stats()
+    assert list(extractor.extract_pages_parallel(dump(), stats=stats, workers=2, dry_run=True, **extract_args())) == []
+    assert stats == expected_stats
+
+class TrackedPage:
+    """Page yielding the revisions of a mwxml page, checking how many texts are still held at each step"""
+    def __init__(self, mw_page):
+        self.id = mw_page.id
+        self.namespace = mw_page.namespace
+        self.title = mw_page.title
+        self.mw_page = mw_page
+        self.revisions_read = list()
+
+    def __iter__(self):
+        for mw_revision in self.mw_page:
+            # at most the text of the newest revision read so far is kept
+            assert sum(1 for rev in self.revisions_read if rev.text is not None) <= 1
+            self.revisions_read.append(mw_revision)
+            yield mw_revision
+
+def test_materialized_page_only_last_revision():
+    page = extractor.MaterializedPage(TrackedPage(next(iter(dump()))), only_last_revision=True)
+    assert [rev.text is not None for rev in page] == [False, False, True]
+    page = extractor.MaterializedPage(next(iter(dump())))
+    assert [rev.text is not None for rev in page] == [True, True, True]
+
+def test_serialize_page():
+    user = mwxml.Revision.User(id=7, text='Ùser')
+    templates = [extractor.extractors.user_warnings_probabilistic_subst.UserWarningTokens('welcomeen-sq', 'not_serious')]
+    pages = [
+        # page without revisions
+        extractor.Page(id=1, namespace=3, title='P1', revisions=[]),
+        # revision without user
+        extractor.Page(id=2, namespace=3, title='P2', revisions=[
+            extractor.Revision(id=20, user=None, timestamp='2012-01-01T00:00:00Z', templates=[]),
+            extractor.Revision(id=21, user=user, timestamp='2012-02-01T00:00:00Z', templates=templates),
+        ]),
+        # non-ascii title
+        extractor.Page(id=3, namespace=3, title='Utente «è» 日本', revisions=[
+            extractor.Revision(id=30, user=user, timestamp='2012-01-01T00:00:00Z', templates=templates),
+        ]),
+    ]
+    for page in pages:
+        serialized_page = b''.join(extractor.serialize_page(page))
+        assert serialized_page.endswith(b'\n')
+        assert json.loads(serialized_page) == page.to_dict()
+
+def tokens_line(title: str, *revisions) -> bytes:
+    return (json.dumps({
+        'title': title,
+        'revisions': [{'timestamp': timestamp, 'words_to_search': words} for timestamp, words in revisions]
+    }) + '\n').encode('utf-8')
+
+def test_extract_templates_words(tmp_path, capsys):
+    truncated_line = tokens_line('truncated', ('2010-01-01T00:00:00Z', ['lost']))[:20] + b'\n'
+    contents = {
+        'tokens.json.bz2': (bz2.open, [tokens_line('first', ('2010-01-01T00:00:00Z', ['hello', 'world'])), b'\n', truncated_line]),
+        'tokens.json.gz': (gzip.open, [b'   \n', tokens_line('second', ('2011-01-01T00:00:00Z', ['bye']), ('2012-01-01T00:00:00Z', ['bye', 'world']))]),
+        # last line without the trailing newline
+        'tokens.json': (open, [truncated_line, tokens_line('third', ('2012-01-01T00:00:00Z', ['welcome']))[:-1]]),
+    }
+    files = list()
+    for file_name, (opener, lines) in contents.items():
+        with opener(str(tmp_path / file_name), 'wb') as f:
+            f.write(b''.join(lines))
+        files.append(tmp_path / file_name)
+
+    templates_dictionary = extractor.extract_templates_words(files=files)
+    # only the truncated lines are reported, the blank ones are skipped silently
+    log = capsys.readouterr().err
+    assert log.count('Skipped malformed line') == 2
+    assert 'Skipped malformed line 3 of {}'.format(files[0]) in log
+    assert 'Skipped malformed line 1 of {}'.format(files[2]) in log
+    assert templates_dictionary == {
+        'first': [(('hello', 'world'), datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc))],
+        'second': [
+            (('bye',), datetime.datetime(2011, 1, 1, tzinfo=datetime.timezone.utc)),
+            (('bye', 'world'), datetime.datetime(2012, 1, 1, tzinfo=datetime.timezone.utc)),
+        ],
+        'third': [(('welcome',), datetime.datetime(2012, 1, 1, tzinfo=datetime.timezone.utc))],
+    }
+    parallel_templates_dictionary = extractor.extract_templates_words(files=files, parallel=True)
+    assert parallel_templates_dictionary == templates_dictionary
+    # the strings loaded by the other processes are interned in this one
+    for title, revisions in parallel_templates_dictionary.items():
+        assert sys.intern(title) is title
+        for words, _ in revisions:
+            assert all(sys.intern(word) is word for word in words)
+
+def test_merge_stats():
+    stats = extractor.new_stats()
+    partial_stats = extractor.new_stats()
+    partial_stats['performance']['pages_analyzed'] = 2
+    partial_stats['performance']['revisions_analyzed'] = 5
+    partial_stats['user_warnings_stats']['total'] = 1
+    partial_stats['user_warnings_stats']['template_recognized'] = collections.Counter({'welcomeen-sq': 1})
+    extractor.merge_stats(stats, partial_stats)
+    extractor.merge_stats(stats, partial_stats)
+    assert stats['performance']['pages_analyzed'] == 4
+    assert stats['performance']['revisions_analyzed'] == 10
+    assert stats['user_warnings_stats']['total'] == 2
+    assert stats['user_warnings_stats']['template_recognized'] == collections.Counter({'welcomeen-sq': 2})
+
+def test_templates_recognized_stats():
+    template_recognized = collections.Counter({'welcomeen-sq': 3})
+    assert extractor.templates_recognized_stats(template_recognized) == {
+        'welcomeen-sq': {
+            'category': user_warnings_probabilistic_subst.template_category_mapping['welcomeen-sq'],
+            'occurences': 3,
+        }
+    }
+
+def test_workers_truncated_dump():
+    xml = dump_xml()
+    truncated_dump = mwxml.Dump.from_file(io.BytesIO(xml[:len(xml) // 2]))
+    with pytest.raises(Exception):
+        list(extractor.extract_pages_parallel(truncated_dump, stats=extractor.new_stats(), workers=2, **extract_args()))
+
+def test_workers_extraction_error(monkeypatch):
+    extract_revisions = extractor.extract_revisions
+    def failing_extract_revisions(mw_page, **kwargs):
+        if mw_page.title == 'P6':
+            raise ValueError('broken page')
+        return extract_revisions(mw_page, **kwargs)
+    monkeypatch.setattr(extractor, 'extract_revisions', failing_extract_revisions)
+    with pytest.raises(ValueError, match='broken page'):
+        list(extractor.extract_pages_parallel(dump(), stats=extractor.new_stats(), workers=2, **extract_args()))
+
+def test_workers_killed(monkeypatch):
+    extract_revisions = extractor.extract_revisions
+    def killing_extract_revisions(mw_page, **kwargs):
+        if mw_page.title == 'P6':
+            os.kill(os.getpid(), signal.SIGKILL)
+        return extract_revisions(mw_page, **kwargs)
+    monkeypatch.setattr(extractor, 'extract_revisions', killing_extract_revisions)
+    with pytest.raises(RuntimeError, match='exited with code'):
+        list(extractor.extract_pages_parallel(dump(), stats=extractor.new_stats(), workers=2, **extract_args()))
+
+def test_positive_int():
+    assert extractor.positive_int('3') == 3
+    for value in ('0', '-1'):
+        with pytest.raises(extractor.argparse.ArgumentTypeError):
+            extractor.positive_int(value)
@@ -0,0 +1,64 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..', 'wikidump'))
+import bz2
+import gzip
+import shutil
+import subprocess
+import pytest
+import mw.xml_dump
+from wikidump import __main__ as main
+
+XML = b'<mediawiki><page><title>P</title></page></mediawiki>\n' * 1000
+
+# decompressors installed everywhere, in place of pigz and lbzip2
+DECOMPRESSORS = {
+    '.gz': [['not-installed', '-dc'], ['gzip', '-dc']],
+    '.bz2': [['bzip2', '-dc']],
+}
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Records the commands started to decompress the dumps"""
+    started = list()
+    popen = subprocess.Popen
+    class RecordingPopen(popen):
+        def __init__(self, args, *popen_args, **kwargs):
+            started.append(args[0])
+            super().__init__(args, *popen_args, **kwargs)
+    monkeypatch.setattr(subprocess, 'Popen', RecordingPopen)
+    monkeypatch.setattr(main, 'PARALLEL_DECOMPRESSORS', DECOMPRESSORS)
+    return started
+
+def write_dumps(tmp_path):
+    gz_path = str(tmp_path / 'dump.xml.gz')
+    bz2_path = str(tmp_path / 'dump.xml.bz2')
+    with gzip.open(gz_path, 'wb') as f:
+        f.write(XML)
+    with bz2.open(bz2_path, 'wb') as f:
+        f.write(XML)
+    return gz_path, bz2_path
+
+def test_open_xml_file_decompressors(tmp_path, monkeypatch, commands):
+    which = shutil.which
+    monkeypatch.setattr(shutil, 'which', lambda command: None if command == 'not-installed' else which(command))
+    for path in write_dumps(tmp_path):
+        with main.open_xml_file(path) as f:
+            assert f.read() == XML
+    # the first decompressor installed is used
+    assert commands == ['gzip', 'bzip2']
+
+def test_open_xml_file_fallback(tmp_path, monkeypatch, commands):
+    monkeypatch.setattr(shutil, 'which', lambda command: None)
+    for path in write_dumps(tmp_path):
+        with main.open_xml_file(path) as f:
+            assert f.read() == XML
+    # the decompressors of mw.xml_dump
+    assert commands == ['zcat', 'bzcat']
+
+def test_open_xml_file_missing(tmp_path, monkeypatch, commands):
+    for available in (True, False):
+        monkeypatch.setattr(shutil, 'which', lambda command: '/usr/bin/' + command if available else None)
+        for suffix in ('.gz', '.bz2', '.xml'):
+            with pytest.raises(mw.xml_dump.errors.FileTypeError, match="Can't find file"):
+                main.open_xml_file(str(tmp_path / ('missing' + suffix)))
+    assert commands == []
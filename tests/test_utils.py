@@ -0,0 +1,78 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..', 'wikidump'))
+import io
+import time
+import random
+import pytest
+import regex as re
+from wikidump import utils
+
+# the regex replaced by utils.remove_comments
+COMMENTS_REGEX = re.compile(r'<!--(.*?)-->', re.DOTALL)
+
+COMMENTS_CASES = [
+    ('', ''),
+    ('no comments', 'no comments'),
+    ('a<!-- b -->c', 'ac'),
+    ('a<!-- b -->c<!-- d -->e', 'ace'),
+    ('a<!---->b', 'ab'),
+    ('a<!-->b-->c', 'ac'),
+    ('a<!-- unterminated', 'a<!-- unterminated'),
+    ('a<!-- b -->c<!-- unterminated', 'ac<!-- unterminated'),
+    ('a<!-- <!-- nested --> b -->c', 'a b -->c'),
+    ('a<!--\nmultiline\n-->b', 'ab'),
+    ('a-->b<!--c', 'a-->b<!--c'),
+]
+
+def test_remove_comments():
+    for text, expected in COMMENTS_CASES:
+        assert utils.remove_comments(text) == expected
+        assert utils.remove_comments(text) == COMMENTS_REGEX.sub('', text)
+
+def test_remove_comments_random():
+    rng = random.Random(0)
+    pieces = ['<!--', '-->', '<!', '--', '>', '-', '<', 'a', ' ', '\n', 'è']
+    for _ in range(20000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+        assert utils.remove_comments(text) == COMMENTS_REGEX.sub('', text)
+
+def test_iter_with_last():
+    assert list(utils.iter_with_last([])) == []
+    assert list(utils.iter_with_last(['a'])) == [('a', True)]
+    assert list(utils.iter_with_last(iter('abc'))) == [('a', False), ('b', False), ('c', True)]
+
+def test_iter_in_thread():
+    assert list(utils.iter_in_thread(range(100), maxsize=4)) == list(range(100))
+    assert list(utils.iter_in_thread([])) == []
+
+def test_iter_in_thread_bounded():
+    produced = list()
+    def elements():
+        for el in range(100):
+            produced.append(el)
+            yield el
+    iterator = iter(utils.iter_in_thread(elements(), maxsize=4))
+    assert next(iterator) == 0
+    time.sleep(0.1)
+    # the queue is full, plus the element blocked in the put and the one already consumed
+    assert len(produced) <= 4 + 2
+
+def test_iter_in_thread_error():
+    def elements():
+        yield 1
+        raise ValueError('broken iterable')
+    iterator = iter(utils.iter_in_thread(elements()))
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match='broken iterable'):
+        next(iterator)
+
+def test_prefetch_reader_partial_blocks():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'hello')
+    reader = io.BufferedReader(utils.PrefetchReader(open(read_fd, 'rb')))
+    # the available bytes are returned without waiting for a whole block
+    assert reader.read1(utils.PREFETCH_BLOCK_SIZE) == b'hello'
+    os.write(write_fd, b' world')
+    os.close(write_fd)
+    assert reader.read() == b' world'
+    reader.close()
@@ -3,6 +3,7 @@ import os
 import io
 import bz2
 import gzip
+import shutil
 import argparse
 import subprocess
 from joblib import Parallel, delayed
@@ -14,12 +15,43 @@ from typing import IO, Optional, Union
 
 from . import processors, utils
 
+# size of the pipe buffer between the decompressor and the xml parser
+READ_BUFFER_SIZE = 1 << 20
+
+# faster decompressors, tried in order, before falling back to the ones of mw.xml_dump:
+# lbzip2 and pbzip2 decompress the bz2 blocks in parallel, pigz inflates on a single
+# thread (gzip streams can't be split) but reads, writes and checks the crc in separate ones
+PARALLEL_DECOMPRESSORS = {
+    '.gz': [['pigz', '-dc']],
+    '.bz2': [['lbzip2', '-dc'], ['pbzip2', '-dc']],
+}
+
+
 def open_xml_file(path: Union[str, IO]):
     """Open an xml file, decompressing it if necessary."""
-    f = mw.xml_dump.functions.open_file(
-        mw.xml_dump.functions.file(path)
-    )
-    return f
+    # raises FileTypeError if the file doesn't exist or has an unknown extension
+    path = mw.xml_dump.functions.file(path)
+    if isinstance(path, str):
+        for command in PARALLEL_DECOMPRESSORS.get(pathlib.Path(path).suffix, []):
+            if shutil.which(command[0]):
+                p = subprocess.Popen(
+                    command + [path],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    bufsize=READ_BUFFER_SIZE,
+                )
+                return prefetch(p.stdout)
+    f = mw.xml_dump.functions.open_file(path)
+    return prefetch(f)
+
+
+def prefetch(f: IO) -> IO:
+    """Read a file-object ahead of the xml parser, in a background thread."""
+    return io.BufferedReader(utils.PrefetchReader(f), buffer_size=READ_BUFFER_SIZE)
+
+
+# size of the buffer collecting the writes before they reach the (compressed) output file
+WRITE_BUFFER_SIZE = 1 << 20
 
 
 def compressor_7z(file_path: str):
@@ -29,20 +61,26 @@ def compressor_7z(file_path: str):
         stdin=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
         stdout=subprocess.DEVNULL,
+        bufsize=WRITE_BUFFER_SIZE,
     )
     return io.TextIOWrapper(p.stdin, encoding='utf-8')
 
 
 def output_writer(path: str, compression: Optional[str]):
-    """Write data to a compressed file."""
+    """Write data to a compressed file.
+
+    The returned text file-object exposes the underlying binary stream as
+    `buffer`, so that already encoded data can be written directly.
+    """
     if compression == '7z':
         return compressor_7z(path + '.7z')
     if compression == 'bz2':
-        return bz2.open(path + '.bz2', 'wt', encoding='utf-8')
+        raw = bz2.open(path + '.bz2', 'wb')
     elif compression == 'gzip':
-        return gzip.open(path + '.gz', 'wt', encoding='utf-8')
+        raw = gzip.open(path + '.gz', 'wb')
     else:
-        return open(path, 'wt', encoding='utf-8')
+        raw = open(path, 'wb', buffering=0)
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=WRITE_BUFFER_SIZE), encoding='utf-8')
 
 
 def create_path(path: Union[pathlib.Path, str]):
@@ -143,5 +181,7 @@ if __name__ == '__main__':
     args = get_args()
     # n_cores 
     num_core = multiprocessing.cpu_count()
+    # cores left to the files once each dump has taken its own workers
+    num_jobs = min(len(args.files), max(1, num_core // getattr(args, 'workers', 1)))
     # parallel
-    Parallel(n_jobs=num_core)(delayed(main)(args, path) for path in args.files)
+    Parallel(n_jobs=num_jobs)(delayed(main)(args, path) for path in args.files)
@@ -4,6 +4,8 @@ class UserWarningTokens:
     """Class which stores some info about the user warnings tokens found in a user talk page according to a template mapping"""
 
     """The pair regexp and parameters"""
+    __slots__ = ('name', 'category')
+
     def __init__(self, name: str, category: str):
         self.name = name
         self.category = category
@@ -4,6 +4,8 @@ class Wikibreak:
     """Class which stores the possible attributes, if any, of a wikibreak object"""
 
     """The set of relevants attribute of the wikibreak"""
+    __slots__ = ('wikibreak_category', 'wikibreak_subcategory', 'wikibreak_name', 'options', 'at_least_one_parameter')
+
     def __init__(self, wikibreak_name: str, wikibreak_category: Iterable[str], wikibreak_subcategory: str,options: Mapping, at_least_one_parameter: bool):
         if all(isinstance(i, list) for i in wikibreak_category):
             wikibreak_category = wikibreak_category[0]
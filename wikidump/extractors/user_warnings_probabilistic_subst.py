@@ -5,13 +5,16 @@ https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
 
 import ahocorasick
 import regex as re
-from typing import Iterable, Mapping, Mapping, Tuple
+from typing import FrozenSet, Iterable, Mapping, Mapping, MutableMapping, Optional, Tuple
 from .. import user_warnings_ca, user_warnings_en, user_warnings_es, user_warnings_it
 from .types.user_warnings_token import UserWarningTokens
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 import Stemmer
 import bisect
+import functools
+import sys
+import operator
 from backports.datetime_fromisoformat import MonkeyPatch
 import ahocorasick
 import datetime
@@ -35,6 +38,9 @@ template_category_mapping.update(user_warnings_es.plantillas_mapping)
 template_category_mapping.update(user_warnings_en.template_mappings)
 template_category_mapping.update(user_warnings_it.templates_mapping)
 
+# maximum number of tries kept in a trie cache
+TRIE_CACHE_SIZE = 64
+
 # exports 
 __all__ = ['extract_probabilistic_user_warning_templates', 'extract_probabilistic_user_warning_templates_last_revision', 'UserWarningTokens']
 
@@ -43,10 +49,11 @@ def extract_probabilistic_user_warning_templates(
     language: str,
     timestamp: str,
     templates_dictionary: Mapping,
-    use_stemmer: bool) -> Iterable[UserWarningTokens]:
+    use_stemmer: bool,
+    trie_cache: Optional[MutableMapping] = None) -> Iterable[UserWarningTokens]:
 
     # candidates templates
-    candidates_template = dict()                # candidate templates with occurences
+    candidates_template = dict()                # candidate templates with the number of distinct words found
     words_found = set()                         # all the words that matches
     templates_found = list()                    # templates found
     words_mapping_current_timestamp = dict()    # collection of words of a given template at the revision timestamp
@@ -58,14 +65,14 @@ def extract_probabilistic_user_warning_templates(
     revision_date = datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
 
     # build the template trie
-    template_trie, words_mapping_current_timestamp = build_trie_current_timestamp(templates_dictionary, revision_date)
+    template_trie, words_mapping_current_timestamp = build_trie_current_timestamp(templates_dictionary, revision_date, trie_cache)
 
     # No template available at that time
     if not template_trie:
         return list()
     
     # Search the words thanks to the rie and aho-corasick algorithm
-    for _, (templates, word) in template_trie.iter(text):
+    for templates, word in scan(template_trie, text):
         for referred_template in templates:
             if not referred_template in candidates_template:
                 candidates_template[referred_template] = 0
@@ -81,7 +88,7 @@ def extract_probabilistic_user_warning_templates(
         words_list,_ = template_at_that_timestamp
         if words_found.issuperset(set(words_list)):
             # add the found template
-            templates_found.append(UserWarningTokens(template.lower(), template_category_mapping[template.lower()]))
+            templates_found.append(UserWarningTokens(sys.intern(template.lower()), template_category_mapping[template.lower()]))
     return templates_found
 
 
@@ -91,10 +98,11 @@ def extract_probabilistic_user_warning_templates_last_revision(
     timestamp_first: datetime.datetime,
     timestamp_last: datetime.datetime,
     templates_dictionary: Mapping,
-    use_stemmer: bool) -> Iterable[UserWarningTokens]:
+    use_stemmer: bool,
+    trie_cache: Optional[MutableMapping] = None) -> Iterable[UserWarningTokens]:
     
     # candidates templates
-    candidates_template = dict()                # candidate templates with occurences
+    candidates_template = dict()                # candidate templates with the number of distinct words found
     words_found = set()                         # all the words that matches
     templates_found = list()                    # templates found
     words_mapping = dict()                      # collection of words of a given template at the revision timestamp
@@ -103,14 +111,14 @@ def extract_probabilistic_user_warning_templates_last_revision(
     text = clean_text(text, language, use_stemmer)
 
     # build the template trie (not for a given timestamp but from the first timestamp to the last timestamp)
-    template_trie, words_mapping = build_trie_from_to(templates_dictionary, timestamp_first, timestamp_last)
+    template_trie, words_mapping = build_trie_from_to(templates_dictionary, timestamp_first, timestamp_last, trie_cache)
     
     # No template available at that time
     if not template_trie:
         return list()
 
     # Search the words thanks to the rie and aho-corasick algorithm
-    for _, (templates, word) in template_trie.iter(text):
+    for templates, word in scan(template_trie, text):
         for referred_template in templates:
             if not referred_template in candidates_template:
                 candidates_template[referred_template] = 0
@@ -127,21 +135,35 @@ def extract_probabilistic_user_warning_templates_last_revision(
             # check if it is contained for real
             if words_found.issuperset(set(words_list)):
                 # add the found template
-                templates_found.append(UserWarningTokens(template.lower(), template_category_mapping[template.lower()]))
+                templates_found.append(UserWarningTokens(sys.intern(template.lower()), template_category_mapping[template.lower()]))
                 # exit the loop, because the template was found
                 break
 
     return templates_found
 
-def build_trie_current_timestamp(template_dictionary: Mapping, timestamp: datetime.datetime) -> Tuple[ahocorasick.Automaton, Mapping]:
+def scan(trie: ahocorasick.Automaton, text: str) -> Iterable[Tuple[Tuple[str], str]]:
+    """Returns the distinct (templates, word) values found in the text, in order of first occurrence.
+
+    The hits are deduplicated by C-coded iteration, so the Python loops of the
+    callers run once per matched word rather than once per occurrence.
+    """
+    return dict.fromkeys(map(operator.itemgetter(1), trie.iter(text)))
+
+def build_trie_current_timestamp(template_dictionary: Mapping, timestamp: datetime.datetime, trie_cache: Optional[MutableMapping] = None) -> Tuple[ahocorasick.Automaton, Mapping]:
     """Function which builds the trie from the previous mapping by the specified timestamp"""
+    # index of the template revision to consider for each template, None if the template did not exist yet
+    selected_revisions = tuple(find_previous_timestamp(template_dictionary[template], timestamp) for template in template_dictionary)
+
+    # the same template revisions have already been selected by a previous timestamp
+    cache_key = ('current', selected_revisions)
+    if trie_cache is not None and cache_key in trie_cache:
+        return trie_cache[cache_key]
+
     trie = ahocorasick.Automaton()              # trie
     words_mapping_current_timestamp = dict()
     word_templates = dict()
     # collect the words and the template associated (a list of them if multiple template is associated)
-    for template in template_dictionary: 
-        # list of words of the template at that given timestamp
-        template_at_that_timestamp = find_previous_timestamp(template_dictionary[template], timestamp)
+    for template, template_at_that_timestamp in zip(template_dictionary, selected_revisions): 
         # if it exists
         if template_at_that_timestamp != None:
             template_at_that_timestamp = template_dictionary[template][template_at_that_timestamp]
@@ -155,23 +177,34 @@ def build_trie_current_timestamp(template_dictionary: Mapping, timestamp: dateti
                 word_templates[word].append(template)
 
     for word in word_templates:
-        trie.add_word(word, (word_templates[word], word))   # key is the word to search, value is the template
+        trie.add_word(word, (tuple(word_templates[word]), word))   # key is the word to search, value is the template
     trie.make_automaton()
 
     if not word_templates:
-        return None, None
+        trie, words_mapping_current_timestamp = None, None
+
+    store_trie(trie_cache, cache_key, (trie, words_mapping_current_timestamp))
 
     return trie, words_mapping_current_timestamp
 
-def build_trie_from_to(template_dictionary: Mapping, from_timestamp: datetime.datetime, to_timestamp: datetime.datetime) -> Tuple[ahocorasick.Automaton, Mapping]:
+def build_trie_from_to(template_dictionary: Mapping, from_timestamp: datetime.datetime, to_timestamp: datetime.datetime, trie_cache: Optional[MutableMapping] = None) -> Tuple[ahocorasick.Automaton, Mapping]:
     """Function which builds the trie from the first timestamp tot the last one given"""
+    # range of the template revisions to consider for each template
+    selected_revisions = tuple(
+        (find_previous_timestamp(template_dictionary[template], from_timestamp) or 0, bisect.bisect_right(KeyList(template_dictionary[template], key=lambda x: x[1]), to_timestamp))
+        for template in template_dictionary
+    )
+
+    # the same template revisions have already been selected by a previous timestamps pair
+    cache_key = ('from_to', selected_revisions)
+    if trie_cache is not None and cache_key in trie_cache:
+        return trie_cache[cache_key]
+
     trie = ahocorasick.Automaton()
     words_mapping = dict()  # words mapping
     word_templates = dict() # words template
     # collect the words and the template associated (a list of them if multiple template is associated)
-    for template in template_dictionary:
-        # index first template to consider
-        index_first_timestamp = find_previous_timestamp(template_dictionary[template], from_timestamp) or 0
+    for template, (index_first_timestamp, _) in zip(template_dictionary, selected_revisions):
         # for all the revisions of that template starting from the first date possible
         for index in range(index_first_timestamp, len(template_dictionary[template])):
             
@@ -190,14 +223,24 @@ def build_trie_from_to(template_dictionary: Mapping, from_timestamp: datetime.da
                 word_templates[word].append(template)
             
     for word in word_templates:
-        trie.add_word(word, (word_templates[word], word))   # key is the word to search, value is the template
+        trie.add_word(word, (tuple(word_templates[word]), word))   # key is the word to search, value is the template
     trie.make_automaton()
 
     if not word_templates:
-        return None, None
+        trie, words_mapping = None, None
+
+    store_trie(trie_cache, cache_key, (trie, words_mapping))
 
     return trie, words_mapping
 
+def store_trie(trie_cache: Optional[MutableMapping], cache_key: Tuple, value: Tuple[ahocorasick.Automaton, Mapping]) -> None:
+    """Stores the trie in the cache, if any, evicting the oldest one when the cache is full"""
+    if trie_cache is None:
+        return
+    if len(trie_cache) >= TRIE_CACHE_SIZE:
+        del trie_cache[next(iter(trie_cache))]
+    trie_cache[cache_key] = value
+
 def find_previous_timestamp(elem_list: Iterable[Tuple[str, datetime.datetime]], current_timestamp: datetime.datetime):
     '''Find greatest item less or equal to key knowing that the list are ordered by timestamp'''
     i = bisect.bisect_left(KeyList(elem_list, key=lambda x: x[1]), current_timestamp)
@@ -209,12 +252,22 @@ def find_previous_timestamp(elem_list: Iterable[Tuple[str, datetime.datetime]],
         return None
     return i
 
+@functools.lru_cache(maxsize=None)
+def language_stemmer(language: str) -> Stemmer.Stemmer:
+    """Returns the stemmer of the language, built only once"""
+    return Stemmer.Stemmer(language)
+
+@functools.lru_cache(maxsize=None)
+def language_stopwords(language: str) -> FrozenSet[str]:
+    """Returns the stopwords of the language, loaded only once"""
+    return frozenset(stopwords.words(language))
+
 def clean_text(text: str, language: str, use_stemmer: bool) -> str:
     """Clean the string to be iterated"""
-    stemmer = Stemmer.Stemmer(language)
-    text = re.sub(r'[^\w]', ' ', text)
-    text = ' '.join(list(word for word in word_tokenize(text) if not word in stopwords.words(language)))
+    # a single pass for the punctuation removal and a single tokenization of the text
+    text = re.sub(r'[^\w]+', ' ', text)
+    language_stopwords_set = language_stopwords(language)
+    words = [word for word in word_tokenize(text) if not word in language_stopwords_set]
     if use_stemmer:
-        return ' '.join(list(map(stemmer.stemWord, word_tokenize(text))))
-    else:
-        return text
\ No newline at end of file
+        words = language_stemmer(language).stemWords(words)
+    return ' '.join(words)
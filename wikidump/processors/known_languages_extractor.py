@@ -1,7 +1,6 @@
 """Extract the language known by the registered users in Wikipedia and some statistics about them"""
 
 import json
-import more_itertools
 import mwxml
 import datetime
 from typing import Iterable, Iterator, Mapping
@@ -73,17 +72,13 @@ def extract_revisions(
         only_revisions_with_languages: bool) -> Iterator[Revision]:
     
     """Extracts the known languages within a user page."""
-    revisions = more_itertools.peekable(mw_page)
-
     # Newest revisions, useful only if the only_last_revision flag is set equal to true
     newest_revision = None
 
-    for mw_revision in revisions:
+    # is_last_revision tells if it's the last revision
+    for mw_revision, is_last_revision in utils.iter_with_last(mw_page):
         utils.dot()
 
-        # check if it's last revision
-        is_last_revision = not utils.has_next(revisions)
-
         # remove html comments
         text = utils.remove_comments(mw_revision.text or '')
 
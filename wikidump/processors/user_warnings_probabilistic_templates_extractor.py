@@ -1,13 +1,24 @@
 """Extract the user warning templates by searching the salient words which characterizes the template"""
 
+import io
+import collections
+import os
+import sys
 import json
-import more_itertools
+import argparse
+import orjson
+import pickle
+import queue
+import threading
+import traceback
+import multiprocessing
 import mwxml
 import pathlib
 import datetime
 import bz2
 import gzip
-from typing import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Mapping, MutableMapping, MutableSequence, Optional, Sequence
 from backports.datetime_fromisoformat import MonkeyPatch
 
 from .. import extractors, utils
@@ -18,6 +29,8 @@ MonkeyPatch.patch_fromisoformat()
 # REVISION AND PAGE CLASSES
 class Revision:
     """Class which represent a revision of the user talk page"""
+    __slots__ = ('id', 'user', 'timestamp', 'templates')
+
     def __init__(self, id: str, user: mwxml.Revision.User, timestamp: str, templates: Iterable[extractors.user_warnings_probabilistic_subst.UserWarningTokens]):
         self.id = id                                                # revision id
         self.user = user                                            # revision user
@@ -46,6 +59,8 @@ class Revision:
 
 class Page:
     """Class which represent a page containing a list of revisions"""
+    __slots__ = ('id', 'namespace', 'title', 'revisions')
+
     def __init__(self, id: str, namespace: str, title: str, revisions: Iterator[Revision]):
         self.id = id                            # page id
         self.namespace = namespace              # page namespace
@@ -63,30 +78,95 @@ class Page:
             obj['revisions'].append(rev.to_dict())
         return obj
 
+class MaterializedPage:
+    """Picklable copy of a mwxml page, so that it can be sent to the worker processes"""
+    __slots__ = ('id', 'namespace', 'title', 'revisions')
+
+    def __init__(self, mw_page: mwxml.Page, only_last_revision: bool = False):
+        self.id = mw_page.id                    # page id
+        self.namespace = mw_page.namespace      # page namespace
+        self.title = mw_page.title              # page title
+        self.revisions = list()                 # list of mwxml revisions
+        # only the newest text is searched, the older revisions are kept for their timestamps:
+        # a text is dropped as soon as a newer revision is read, so at most one text is held
+        newest_revision = None
+        for mw_revision in mw_page:
+            if only_last_revision:
+                if newest_revision is None or mw_revision.timestamp.unix() > newest_revision.timestamp.unix():
+                    if newest_revision is not None:
+                        newest_revision.text = None
+                    newest_revision = mw_revision
+                else:
+                    mw_revision.text = None
+            self.revisions.append(mw_revision)
+
+    def __iter__(self) -> Iterator[mwxml.Revision]:
+        return iter(self.revisions)
+
+# maximum number of pages read but not yet written, per worker process:
+# it bounds the pages waiting in the queues and the ones kept to restore the dump order.
+# It is a number of pages, not of bytes: a full-history user talk page can take several GB,
+# and up to PAGES_PER_WORKER * workers of them are held and pickled at once (only their newest text with --only-last-revision)
+PAGES_PER_WORKER = 2
+
+# seconds waited for a result before checking that the workers are still alive
+RESULTS_POLL_TIMEOUT = 1.0
+
+# maximum number of serialized chunks waiting to be written
+WRITE_QUEUE_SIZE = 16
+
+# size of the read buffer wrapped around the (possibly decompressed) tokens files
+READ_BUFFER_SIZE = 1 << 17
+
 # TODO implement 7z reader
-def input_reader(path: str):
+def input_reader(path: str) -> io.BufferedReader:
+    """Open a compressed file, if it is compressed, returning a buffered binary stream"""
     compression = pathlib.Path(path).suffix
-    """Open a compressed file, if it is compressed"""
-    if compression == 'bz2':
-        return bz2.open(path, 'rt')
-    elif compression == 'gzip' or compression == '.gz':
-        return gzip.open(path, 'rt')
+    if compression == '.bz2':
+        raw = bz2.open(path, 'rb')
+    elif compression == '.gzip' or compression == '.gz':
+        raw = gzip.open(path, 'rb')
     else:
-        return open(path, 'rt')
+        raw = open(path, 'rb', buffering=0)
+    return io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE)
+
+def _load_one_file(file_name: pathlib.Path) -> Mapping:
+    """Returns the templates dictionary of a single tokens file, where the key is the name of the template and the value is a list of (words, timestamp) tuples"""
+    template_dictionary = dict()
+    utils.log("Analizying file {}...".format(str(file_name)))
+    with input_reader(str(file_name)) as file:
+        # iterate the raw bytes lines, orjson decodes them without the text layer
+        for line_number, line in enumerate(file, start=1):
+            try:
+                template_page = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # blank or truncated lines are reported and skipped
+                if line.strip():
+                    utils.log("Skipped malformed line {} of {}".format(line_number, str(file_name)))
+                continue
+            # names and words are interned, the same strings are shared by all the revisions and the tries
+            title = sys.intern(template_page['title'])
+            template_dictionary[title] = list() # key = name of the template
+            for rev in template_page['revisions']: # for each revision
+                words = tuple(sys.intern(word) for word in rev['words_to_search'])
+                template_dictionary[title].append((words, datetime.datetime.fromisoformat(rev['timestamp'].replace('Z', '+00:00'))))    # concatenate each words to find (list of lists)
+    return template_dictionary
 
-def extract_templates_words(files: Iterable[pathlib.Path]) -> Mapping:
+def extract_templates_words(files: Iterable[pathlib.Path], parallel: bool = False) -> Mapping:
     """Returns a dictionary where the key is the name of the template and the value is a list of list of words which characterize that template the most and the revision timestamp"""
     template_dictionary = dict()
     utils.log("Preparing the templates dictionary..")
-    for file_name in files:
-        utils.log("Analizying file {}...".format(str(file_name)))
-        file = input_reader(str(file_name))
-        for line in file.readlines():
-            template_page = json.loads(line)
-            template_dictionary[template_page['title']] = list() # key = name of the template
-            for rev in template_page['revisions']: # for each revision
-                template_dictionary[template_page['title']].append((rev['words_to_search'], datetime.datetime.fromisoformat(rev['timestamp'].replace('Z', '+00:00'))))    # concatenate each words to find (list of lists)
-        file.close()
+    files = list(files)
+    if parallel and len(files) > 1:
+        # one file per worker, decompression and decoding overlap across the processes
+        with ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+            for partial_dictionary in executor.map(_load_one_file, files, chunksize=1):
+                # unpickled strings are new objects, intern them in this process too
+                for title, revisions in partial_dictionary.items():
+                    template_dictionary[sys.intern(title)] = [(tuple(sys.intern(word) for word in words), timestamp) for words, timestamp in revisions]
+    else:
+        for file_name in files:
+            template_dictionary.update(_load_one_file(file_name))
     return template_dictionary
 
 def extract_revisions(
@@ -97,31 +177,34 @@ def extract_revisions(
         only_revisions_with_user_warnings: bool,
         templates_dictionary: Mapping,
         language: str,
-        stemmer: bool) -> Iterator[Revision]:
+        stemmer: bool,
+        trie_cache: Optional[MutableMapping] = None) -> Iterator[Revision]:
     
     """Extracts the possible user warnings within a user talk page revision."""
-    revisions = more_itertools.peekable(mw_page)
-
     # Newest revisions, useful only if the only_last_revision flag is set equal to true
     newest_revision = None
-    # date first revision 
-    date_first_revision = None
+    # unix time of the newest and of the first revision, integers are compared instead of parsing the dates
+    newest_epoch = None
+    first_epoch = None
 
-    # only for the last revision, I will explain it later
+    # only for the last revision: the older revisions are only scanned for their timestamps, the templates are searched in the newest one
     if only_last_revision:
 
         # skip until I know the older date and the newest revision of the revision's list
-        for mw_revision in revisions:
+        for mw_revision in mw_page:
             utils.dot()
-            if not newest_revision:
+            current_epoch = mw_revision.timestamp.unix()
+            if newest_revision is None or current_epoch > newest_epoch:
                 newest_revision = mw_revision
-            if not date_first_revision:
-                date_first_revision = datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00'))
-            newest_date = datetime.datetime.fromisoformat(newest_revision.timestamp.to_json().replace('Z', '+00:00'))
-            current_date = datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00'))
-            if current_date > newest_date:
-                newest_revision = mw_revision
-            date_first_revision = min([date_first_revision, current_date])
+                newest_epoch = current_epoch
+            if first_epoch is None or current_epoch < first_epoch:
+                first_epoch = current_epoch
+
+        # page without revisions
+        if newest_revision is None:
+            return
+
+        date_first_revision = datetime.datetime.fromtimestamp(first_epoch, tz=datetime.timezone.utc)
 
         # remove html comments
         text = utils.remove_comments(newest_revision.text or '')
@@ -131,9 +214,10 @@ def extract_revisions(
             text, 
             language,
             date_first_revision,
-            datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00')),
+            datetime.datetime.fromtimestamp(mw_revision.timestamp.unix(), tz=datetime.timezone.utc),
             templates_dictionary,
-            stemmer
+            stemmer,
+            trie_cache
         )
 
         # Build the revision
@@ -150,7 +234,7 @@ def extract_revisions(
         yield rev
 
     else:
-        for mw_revision in revisions:
+        for mw_revision in mw_page:
             utils.dot()
 
             # remove html comments
@@ -162,7 +246,8 @@ def extract_revisions(
                 language,
                 mw_revision.timestamp.to_json(),
                 templates_dictionary,
-                stemmer
+                stemmer,
+                trie_cache
             )
 
             # Build the revision
@@ -173,16 +258,6 @@ def extract_revisions(
                 templates=templates
             )
 
-            # Check the oldest revisions possible
-            if not newest_revision:
-                newest_revision = rev
-            else:
-                newest_date = datetime.datetime.fromisoformat(newest_revision.timestamp.replace('Z', '+00:00'))
-                current_date = datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00'))
-                # change the revision if the current one is newer
-                if newest_date < current_date:
-                    newest_revision = rev
-
             # Update stats
             stats['performance']['revisions_analyzed'] += 1
 
@@ -193,6 +268,20 @@ def extract_revisions(
             else:
                 yield rev
 
+def track_templates(revisions: Iterable[Revision], stats: Mapping) -> Iterator[Revision]:
+    """Yields the revisions of a page, updating the templates stats once all of them have been consumed"""
+
+    # templates found in the page, each one is counted once per page
+    page_templates = set()
+    for rev in revisions:
+        page_templates.update(temp.name for temp in rev.templates)
+        yield rev
+
+    stats['user_warnings_stats']['template_recognized'].update(page_templates)
+
+    if page_templates:
+        stats['user_warnings_stats']['total'] += 1
+
 def extract_pages(
         dump: Iterable[mwxml.Page],
         stats: Mapping,
@@ -201,7 +290,8 @@ def extract_pages(
         only_revisions_with_user_warnings: bool,
         templates_dictionary: Mapping,
         language: str,
-        stemmer: bool) -> Iterator[Page]:
+        stemmer: bool,
+        trie_cache: Optional[MutableMapping] = None) -> Iterator[Page]:
     """Extract the probable templates within a user talk page using templates_dictionary."""
 
     # Loop on all the pages in the dump, one at a time
@@ -213,6 +303,9 @@ def extract_pages(
             utils.log('Skipped (namespace != 3)')
             continue
 
+        # counted before any filter, whether the page is returned or not
+        stats['performance']['pages_analyzed'] += 1
+
         revisions_generator = extract_revisions(
             mw_page,
             stats=stats,
@@ -221,44 +314,238 @@ def extract_pages(
             only_revisions_with_user_warnings=only_revisions_with_user_warnings,
             templates_dictionary=templates_dictionary,
             language=language,
-            stemmer=stemmer
+            stemmer=stemmer,
+            trie_cache=trie_cache
         )
 
-        revisions_list = list(revisions_generator)
-
-        # dictionary which checks the existance of certain templates
-        to_add = dict()
-        n_occurr = 0
-        for rev in revisions_list:
-            for temp in rev.templates:
-                to_add[temp.name] = temp.category
-                n_occurr += 1
-
-        page = Page(
-            id=mw_page.id,
-            namespace=mw_page.namespace,
-            title=mw_page.title,
-            revisions=revisions_list,
-        )
-
-        for key in to_add:
-            if not key in stats['user_warnings_stats']['template_recognized']:
-                stats['user_warnings_stats']['template_recognized'][key] = dict()
-                stats['user_warnings_stats']['template_recognized'][key]['category'] = to_add[key]
-                stats['user_warnings_stats']['template_recognized'][key]['occurences'] = 0
-            stats['user_warnings_stats']['template_recognized'][key]['occurences'] += 1
+        # the templates stats are updated while the revisions are consumed
+        revisions_generator = track_templates(revisions_generator, stats)
 
         # Return only the pages with at least one wikibreak if the flag's active
         if only_pages_with_user_warnings:
-            if n_occurr > 0:
-                stats['user_warnings_stats']['total'] += 1
-                yield page
+            # the page has to be kept in memory until it is known to contain a user warning
+            revisions_list = list(revisions_generator)
+            if any(rev.templates for rev in revisions_list):
+                yield Page(
+                    id=mw_page.id,
+                    namespace=mw_page.namespace,
+                    title=mw_page.title,
+                    revisions=revisions_list,
+                )
         else:
-            if n_occurr > 0:
-                stats['user_warnings_stats']['total'] += 1
-            yield page
+            # the revisions are extracted while the page is being written
+            yield Page(
+                id=mw_page.id,
+                namespace=mw_page.namespace,
+                title=mw_page.title,
+                revisions=revisions_generator,
+            )
 
-        stats['performance']['pages_analyzed'] += 1
+def orjson_default(obj):
+    """Serialization hook for orjson, converting the model classes through their to_dict method"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    return str(obj)
+
+def serialize_page(page: Page) -> Iterator[bytes]:
+    """Serializes a page one revision at a time, so that its revisions are never all held in memory"""
+    header = orjson.dumps({'id': page.id, 'namespace': page.namespace, 'title': page.title})
+    yield header[:-1] + b',"revisions":['
+    separator = b''
+    for rev in page.revisions:
+        yield separator + orjson.dumps(rev, default=orjson_default)
+        separator = b','
+    yield b']}\n'
+
+def new_stats() -> Mapping:
+    """Returns an empty stats dictionary"""
+    return {
+        'performance': {
+            'start_time': None,
+            'end_time': None,
+            'revisions_analyzed': 0,
+            'pages_analyzed': 0,
+        },
+        'user_warnings_stats': {
+            'total': 0, # total users who have at least a user warnigns substituted in their talk page
+            'template_recognized': collections.Counter()   # templates and the number of pages using them
+        }
+    }
+
+def templates_recognized_stats(template_recognized: Mapping) -> Mapping:
+    """Converts the counter of the recognized templates into the templates with their category and usage"""
+    obj = dict()
+    for key, occurences in template_recognized.items():
+        obj[key] = dict()
+        obj[key]['category'] = extractors.user_warnings_probabilistic_subst.template_category_mapping[key]
+        obj[key]['occurences'] = occurences
+    return obj
+
+def merge_stats(stats: Mapping, partial_stats: Mapping) -> None:
+    """Adds the counters of partial_stats, computed by a worker, to stats"""
+    stats['performance']['revisions_analyzed'] += partial_stats['performance']['revisions_analyzed']
+    stats['performance']['pages_analyzed'] += partial_stats['performance']['pages_analyzed']
+    stats['user_warnings_stats']['total'] += partial_stats['user_warnings_stats']['total']
+    stats['user_warnings_stats']['template_recognized'].update(partial_stats['user_warnings_stats']['template_recognized'])
+
+def pages_producer(
+        dump: Iterable[mwxml.Page],
+        pages_queue: multiprocessing.Queue,
+        workers: int,
+        in_flight: threading.Semaphore,
+        stop: threading.Event,
+        errors: MutableSequence,
+        only_last_revision: bool) -> None:
+    """Reads the dump and pushes the numbered user talk pages in the queue, followed by one stop marker per worker.
+    A page is read only when one of the in_flight slots is free, the error raised by the dump, if any, is appended to errors."""
+    try:
+        page_number = 0
+        for mw_page in dump:
+            utils.log("Reading", mw_page.title)
+            if mw_page.namespace != 3:
+                utils.log('Skipped (namespace != 3)')
+                continue
+            # wait for a page to be written, giving up if the extraction has been interrupted
+            while not in_flight.acquire(timeout=RESULTS_POLL_TIMEOUT):
+                if stop.is_set():
+                    return
+            pages_queue.put((page_number, MaterializedPage(mw_page, only_last_revision)))
+            page_number += 1
+    except Exception as error:
+        errors.append(error)
+    finally:
+        # the workers always terminate, even if the dump is broken
+        for _ in range(workers):
+            pages_queue.put(None)
+
+def consume_page(page: Page) -> None:
+    """Runs the extraction of the page without serializing it, the revisions can be a lazy generator"""
+    collections.deque(page.revisions, maxlen=0)
+
+def picklable_exception(error: Exception) -> Exception:
+    """Returns the exception, or a RuntimeError describing it if it can't be sent to the main process"""
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError('{}: {}'.format(type(error).__name__, error))
+
+def pages_worker(
+        worker_index: int,
+        pages_queue: multiprocessing.Queue,
+        results_queue: multiprocessing.Queue,
+        extract_args: Mapping,
+        dry_run: bool) -> None:
+    """Runs extract_pages on the pages pulled from the queue, pushing one ('page', number, serialized page) result per page
+    and finally ('stats', worker_index, stats), or ('error', worker_index, exception) if the extraction fails"""
+    try:
+        stats = new_stats()
+        for page_number, mw_page in iter(pages_queue.get, None):
+            # empty if the page is filtered out, so that the main process knows it has been processed
+            serialized_page = b''
+            for obj in extract_pages((mw_page,), stats=stats, **extract_args):
+                if dry_run:
+                    consume_page(obj)
+                else:
+                    # the whole page is sent at once, so that the pages of different workers are not interleaved
+                    serialized_page = b''.join(serialize_page(obj))
+            results_queue.put(('page', page_number, serialized_page))
+        results_queue.put(('stats', worker_index, stats))
+    except Exception as error:
+        utils.log(traceback.format_exc())
+        results_queue.put(('error', worker_index, picklable_exception(error)))
+
+def check_workers(processes: Sequence[multiprocessing.Process], running: Iterable[int]) -> None:
+    """Raises a RuntimeError if a worker which has not sent its stats is not alive anymore (e.g. killed for lack of memory)"""
+    for worker_index in running:
+        exitcode = processes[worker_index].exitcode
+        if exitcode is not None and exitcode != 0:
+            raise RuntimeError('Worker process {} exited with code {}'.format(worker_index, exitcode))
+
+def extract_pages_parallel(
+        dump: Iterable[mwxml.Page],
+        stats: Mapping,
+        workers: int,
+        dry_run: bool = False,
+        **extract_args) -> Iterator[bytes]:
+    """Distributes the pages of the dump to workers processes running extract_pages, yielding the serialized pages in the dump order.
+    With dry_run the workers extract the pages without sending them back, only the stats are merged.
+    The errors of the dump and of the workers are raised in the calling process."""
+    # explicit context, the joblib workers replace the default one with a context unable to start processes
+    context = multiprocessing.get_context('fork')
+    max_in_flight = workers * PAGES_PER_WORKER
+    # both queues never hold more than the pages in flight, plus the stop markers or the final messages of the workers
+    pages_queue = context.Queue(maxsize=max_in_flight + workers)
+    results_queue = context.Queue(maxsize=max_in_flight + workers)
+
+    # processes are forked before the producer thread starts, but while the dump may already be read ahead
+    # by utils.PrefetchReader: the workers only use the queues, never the dump, nor its prefetch thread
+    processes = [
+        context.Process(target=pages_worker, args=(worker_index, pages_queue, results_queue, extract_args, dry_run))
+        for worker_index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # the dump is read by a single thread of the main process
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    stop = threading.Event()
+    producer_errors = list()
+    producer = threading.Thread(
+        target=pages_producer,
+        args=(dump, pages_queue, workers, in_flight, stop, producer_errors, extract_args['only_last_revision']),
+        daemon=True
+    )
+    producer.start()
+
+    try:
+        # pages completed before the ones preceding them in the dump
+        completed_pages = dict()
+        next_page = 0
+        # each worker ends by sending its stats
+        running = set(range(workers))
+        while running:
+            try:
+                kind, key, value = results_queue.get(timeout=RESULTS_POLL_TIMEOUT)
+            except queue.Empty:
+                check_workers(processes, running)
+                continue
+            if kind == 'page':
+                completed_pages[key] = value
+                while next_page in completed_pages:
+                    serialized_page = completed_pages.pop(next_page)
+                    if serialized_page:
+                        yield serialized_page
+                    # the page is written, the producer can read another one
+                    in_flight.release()
+                    next_page += 1
+            elif kind == 'stats':
+                merge_stats(stats, value)
+                running.discard(key)
+            else:
+                raise value
+
+        producer.join()
+        for process in processes:
+            process.join()
+
+        # the dump could not be read until the end
+        if producer_errors:
+            raise producer_errors[0]
+    finally:
+        # on errors, or if the pages are not consumed till the end, the producer and the workers are stopped
+        stop.set()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+def positive_int(value: str) -> int:
+    """Argparse type of the integers greater than zero"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('{} is not a positive integer'.format(value))
+    return number
 
 def configure_subparsers(subparsers):
     """Configure a new subparser for the known languages."""
@@ -300,6 +587,20 @@ def configure_subparsers(subparsers):
         required=False,
         help='Retrieve stemmed words',
     )
+    parser.add_argument(
+        '--parallel-tokens-loading',
+        action='store_true',
+        required=False,
+        help='Load the tokens files in parallel, one process per file',
+    )
+    parser.add_argument(
+        '--workers',
+        action='store',
+        type=positive_int,
+        default=1,
+        required=False,
+        help='Number of processes extracting the pages of a single dump, the pages are written in the dump order',
+    )
     parser.set_defaults(func=main)
 
 
@@ -310,40 +611,43 @@ def main(
         args) -> None:
     """Main function that parses the arguments and writes the output."""
 
-    stats = {
-        'performance': {
-            'start_time': None,
-            'end_time': None,
-            'revisions_analyzed': 0,
-            'pages_analyzed': 0,
-        },
-        'user_warnings_stats': {
-            'total': 0, # total users who have at least a user warnigns substituted in their talk page
-            'template_recognized': dict()   # templates and its usage
-        }
-    }
+    stats = new_stats()
 
     # dictionary which stores the words which needs to be searched in order to establish if a certain template has been substituted there
     templates_dictionary = extract_templates_words(
         files=args.tokens,
+        parallel=args.parallel_tokens_loading,
     )
 
-    pages_generator = extract_pages(
-        dump,
-        stats=stats,
+    extract_args = dict(
         only_last_revision=args.only_last_revision,
         only_pages_with_user_warnings=args.only_pages_with_user_warnings,
         only_revisions_with_user_warnings=args.only_revisions_with_user_warnings,
         templates_dictionary=templates_dictionary,
         language=args.language,
-        stemmer=args.stemmer
+        stemmer=args.stemmer,
+        trie_cache=dict()   # tries already built for the templates_dictionary, shared by all the revisions
     )
 
     stats['performance']['start_time'] = datetime.datetime.utcnow()
 
-    for obj in pages_generator:
-        features_output_h.write(json.dumps(obj.to_dict()))
-        features_output_h.write("\n")
+    # the pages are already utf-8 encoded by orjson, skip the text layer
+    features_output_h.flush()
+    features_output_b = features_output_h.buffer
+
+    if args.workers > 1:
+        for serialized_page in extract_pages_parallel(dump, stats=stats, workers=args.workers, dry_run=args.dry_run, **extract_args):
+            features_output_b.write(serialized_page)
+    elif args.dry_run:
+        # nothing would be written: the pages are extracted, but neither converted nor serialized
+        for obj in extract_pages(dump, stats=stats, **extract_args):
+            consume_page(obj)
+    else:
+        # pages are parsed, extracted and serialized by a thread, while this one writes them
+        chunks = (chunk for obj in extract_pages(dump, stats=stats, **extract_args) for chunk in serialize_page(obj))
+        for chunk in utils.iter_in_thread(chunks, maxsize=WRITE_QUEUE_SIZE):
+            features_output_b.write(chunk)
     
     stats['performance']['end_time'] = datetime.datetime.utcnow()
+    stats['user_warnings_stats']['template_recognized'] = templates_recognized_stats(stats['user_warnings_stats']['template_recognized'])
     stats_output_h.write(json.dumps(stats, indent=4, default=str))
\ No newline at end of file
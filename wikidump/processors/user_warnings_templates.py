@@ -1,7 +1,6 @@
 """Extract the user warning templates crafting a regex for matching them in the text"""
 
 import json
-import more_itertools
 import mwxml
 import datetime
 from typing import Iterable, Iterator, Mapping, Optional
@@ -102,55 +101,52 @@ class Page:
             obj['revisions'].append(rev.to_dict())
         return obj
 
+def extract_revision(mw_revision: mwxml.Revision) -> Revision:
+    """Extracts the user warning template regex within a template page revision."""
+    # remove html comments
+    text = utils.remove_comments(mw_revision.text or '')
+
+    templates = extractors.user_warnings_template.userwarnings_regex_extractor(text)
+
+    # Build the revision
+    return Revision(
+        id=mw_revision.id,
+        user=mw_revision.user,
+        timestamp=mw_revision.timestamp.to_json(),
+        templates=templates,
+    )
+
 def extract_revisions(
         mw_page: mwxml.Page,
         stats: Mapping,
         only_last_revision: bool) -> Iterator[Revision]:
     
     """Extracts the history of a user_warning_template within a template page."""
-    revisions = more_itertools.peekable(mw_page)
-
-    # Newest revisions, useful only if the only_last_revision flag is set equal to true
-    newest_revision = None
-
-    for mw_revision in revisions:
-        utils.dot()
-
-        # check if it's last revision
-        is_last_revision = not utils.has_next(revisions)
+    # requested only the last revision: the others are only counted, the templates are extracted from the newest one
+    if only_last_revision:
+        newest_revision = None
+        newest_epoch = None
+        for mw_revision in mw_page:
+            utils.dot()
+            current_epoch = mw_revision.timestamp.unix()
+            # change the revision if the current one is newer
+            if newest_revision is None or current_epoch > newest_epoch:
+                newest_revision = mw_revision
+                newest_epoch = current_epoch
 
-        # remove html comments
-        text = utils.remove_comments(mw_revision.text or '')
+            # Update stats
+            stats['performance']['revisions_analyzed'] += 1
 
-        templates = extractors.user_warnings_template.userwarnings_regex_extractor(text)
+        if newest_revision is not None:
+            yield extract_revision(newest_revision)
+    else:
+        for mw_revision in mw_page:
+            utils.dot()
 
-        # Build the revision
-        rev = Revision(
-            id=mw_revision.id,
-            user=mw_revision.user,
-            timestamp=mw_revision.timestamp.to_json(),
-            templates=templates,
-        )
+            # Update stats
+            stats['performance']['revisions_analyzed'] += 1
 
-        # Check the oldest revisions possible
-        if not newest_revision:
-            newest_revision = rev
-        else:
-            newest_date = datetime.datetime.fromisoformat(newest_revision.timestamp.replace('Z', '+00:00'))
-            current_date = datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00'))
-            # change the revision if the current one is newer
-            if newest_date < current_date:
-                newest_revision = rev
-
-        # Update stats
-        stats['performance']['revisions_analyzed'] += 1
-
-        # requested only the last revision
-        if only_last_revision:
-            if is_last_revision:
-                yield newest_revision
-        else:
-            yield rev
+            yield extract_revision(mw_revision)
 
 def extract_pages(
         dump: Iterable[mwxml.Page],
@@ -1,7 +1,6 @@
 """Extract the most recurrent tokens of the template text"""
 
 import json
-import more_itertools
 import mwxml
 import datetime
 from typing import Iterable, Iterator, Mapping, Optional
@@ -120,6 +119,22 @@ class Page:
         obj['idf'] = self.idf
         return obj
 
+def extract_revision(mw_revision: mwxml.Revision, language: str, stemmer: bool) -> Revision:
+    """Extracts the template text and its words within a template page revision."""
+    # remove html comments
+    text = utils.remove_comments(mw_revision.text or '')
+
+    # extract the template text and other info
+    template_info = extractors.user_warnings_template_words.userwarnings_words_extractor(text, language, stemmer)
+
+    # Build the revision
+    return Revision(
+        id=mw_revision.id,
+        user=mw_revision.user,
+        timestamp=mw_revision.timestamp.to_json(),
+        template_info=template_info,
+    )
+
 def extract_revisions(
         mw_page: mwxml.Page,
         stats: Mapping,
@@ -128,50 +143,31 @@ def extract_revisions(
         stemmer: bool) -> Iterator[Revision]:
     
     """Extracts the history of a user_warning_template within a template page -> most important keywords."""
-    revisions = more_itertools.peekable(mw_page)
-
-    # Newest revisions, useful only if the only_last_revision flag is set equal to true
-    newest_revision = None
-
-    for mw_revision in revisions:
-        utils.dot()
-
-        # check if it's last revision
-        is_last_revision = not utils.has_next(revisions)
-
-        # remove html comments
-        text = utils.remove_comments(mw_revision.text or '')
+    # requested only the last revision: the others are only counted, the words are extracted from the newest one
+    if only_last_revision:
+        newest_revision = None
+        newest_epoch = None
+        for mw_revision in mw_page:
+            utils.dot()
+            current_epoch = mw_revision.timestamp.unix()
+            # change the revision if the current one is newer
+            if newest_revision is None or current_epoch > newest_epoch:
+                newest_revision = mw_revision
+                newest_epoch = current_epoch
 
-        # extract the template text and other info
-        template_info = extractors.user_warnings_template_words.userwarnings_words_extractor(text, language, stemmer)
+            # Update stats
+            stats['performance']['revisions_analyzed'] += 1
 
-        # Build the revision
-        rev = Revision(
-            id=mw_revision.id,
-            user=mw_revision.user,
-            timestamp=mw_revision.timestamp.to_json(),
-            template_info=template_info,
-        )
+        if newest_revision is not None:
+            yield extract_revision(newest_revision, language, stemmer)
+    else:
+        for mw_revision in mw_page:
+            utils.dot()
 
-        # Check the oldest revisions possible
-        if not newest_revision:
-            newest_revision = rev
-        else:
-            newest_date = datetime.datetime.fromisoformat(newest_revision.timestamp.replace('Z', '+00:00'))
-            current_date = datetime.datetime.fromisoformat(mw_revision.timestamp.to_json().replace('Z', '+00:00'))
-            # change the revision if the current one is newer
-            if newest_date < current_date:
-                newest_revision = rev
+            # Update stats
+            stats['performance']['revisions_analyzed'] += 1
 
-        # Update stats
-        stats['performance']['revisions_analyzed'] += 1
-
-        # requested only the last revision
-        if only_last_revision:
-            if is_last_revision:
-                yield newest_revision
-        else:
-            yield rev
+            yield extract_revision(mw_revision, language, stemmer)
 
 def extract_pages(
         dump: Iterable[mwxml.Page],
@@ -195,6 +191,9 @@ def extract_pages(
             utils.log('Skipped (namespace != 10)')
             continue
 
+        # counted before any filter, whether the page is returned or not
+        stats['performance']['pages_analyzed'] += 1
+
         # flag which tells if the revision can be stored
         store_flag = False
 
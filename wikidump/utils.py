@@ -1,11 +1,12 @@
 """Various utilities."""
 
 import functools
+import io
 import itertools
+import queue
 import sys
+import threading
 
-import more_itertools
-import regex as re
 from typing import (Generic, Iterable, List, NamedTuple, Optional, T, Tuple, TypeVar)
 
 
@@ -75,6 +76,25 @@ def iter_with_prev(iterable: Iterable[T]) -> Iterable[Tuple[T, T]]:
         last = el
 
 
+T = TypeVar('T')
+def iter_with_last(iterable: Iterable[T]) -> Iterable[Tuple[T, bool]]:
+    """Iterate over an iterable, yielding each element and whether it is the
+    last one.
+
+    The elements are yielded one step behind the iteration, so no lookahead
+    on the iterable is needed.
+    """
+    iterator = iter(iterable)
+    try:
+        previous = next(iterator)
+    except StopIteration:
+        return
+    for el in iterator:
+        yield previous, False
+        previous = el
+    yield previous, True
+
+
 def dot(num: Optional[int]=None) -> None:
     """Write a dot "." to the stderr stream."""
     if not num:
@@ -93,18 +113,121 @@ def log(*args):
 
 
 def remove_comments(source: str) -> str:
-    """Remove all the html comments from a string."""
-    pattern = re.compile(r'<!--(.*?)-->', re.MULTILINE | re.DOTALL)
-    return pattern.sub('', source)
+    """Remove all the html comments from a string.
 
+    Equivalent to substituting r'<!--(.*?)-->' (DOTALL) with '', but the
+    comment boundaries are located by str.find, so the text is scanned in C
+    and revisions without comments are returned as they are.
+    """
+    start = source.find('<!--')
+    if start < 0:
+        return source
+    pieces = list()
+    position = 0
+    while start >= 0:
+        end = source.find('-->', start + 4)
+        # unterminated comment, kept as it is
+        if end < 0:
+            break
+        pieces.append(source[position:start])
+        position = end + 3
+        start = source.find('<!--', position)
+    pieces.append(source[position:])
+    return ''.join(pieces)
+
+
+# maximum size of a block read ahead by PrefetchReader
+PREFETCH_BLOCK_SIZE = 1 << 20
+# maximum number of blocks read ahead by PrefetchReader
+PREFETCH_WINDOWS = 8
+
+
+class PrefetchReader(io.RawIOBase):
+    """Raw stream reading a file-object in a background thread.
+
+    Up to `windows` blocks of at most `block_size` bytes are read ahead of
+    the consumer, so that the producer of the data (e.g. a decompressor
+    piping into the file-object) is never stalled by a full pipe while the
+    consumer is busy. A block holds the bytes already available, the
+    consumer doesn't wait for a whole block to be filled.
+    """
 
-def has_next(peekable: more_itertools.peekable) -> bool:
-    """Return True if the peekable has a next element."""
-    try:
-        peekable.peek()
+    def __init__(self, raw, block_size: int=PREFETCH_BLOCK_SIZE, windows: int=PREFETCH_WINDOWS):
+        super().__init__()
+        self._raw = raw
+        self._block_size = block_size
+        self._blocks = queue.Queue(maxsize=windows)
+        self._current = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _fill(self) -> None:
+        """Read the blocks from the raw file-object, followed by an empty block."""
+        # read1 returns what a single read of the underlying stream gives
+        read = getattr(self._raw, 'read1', self._raw.read)
+        try:
+            while True:
+                block = read(self._block_size)
+                if not block:
+                    break
+                self._blocks.put(block)
+        except Exception as e:
+            self._blocks.put(e)
+        self._blocks.put(b'')
+
+    def readable(self) -> bool:
         return True
-    except StopIteration:
-        return False
+
+    def readinto(self, buffer) -> int:
+        if not self._current:
+            if self._eof:
+                return 0
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                self._eof = True
+                return 0
+            self._current = memoryview(block)
+        size = min(len(buffer), len(self._current))
+        buffer[:size] = self._current[:size]
+        self._current = self._current[size:]
+        return size
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+def iter_in_thread(iterable: Iterable[T], maxsize: int=16) -> Iterable[T]:
+    """Iterate over an iterable which is consumed by a background thread.
+
+    At most `maxsize` elements are produced ahead of the consumer; an
+    exception raised by the iterable is re-raised by the consumer.
+    """
+    elements = queue.Queue(maxsize=maxsize)
+    end = object()
+
+    def fill():
+        try:
+            for el in iterable:
+                elements.put((el, None))
+        except Exception as e:
+            elements.put((None, e))
+            return
+        elements.put((end, None))
+
+    thread = threading.Thread(target=fill, daemon=True)
+    thread.start()
+    while True:
+        el, error = elements.get()
+        if error is not None:
+            raise error
+        if el is end:
+            break
+        yield el
+    thread.join()
 
 
 def grouper(iterable, n, fillvalue=None):